@@ -1,44 +1,68 @@
 import asyncio
+from collections import defaultdict
 from dataclasses import dataclass
-import json
+import logging
 import random
 import time
 from typing import Dict, List
 import heapq
 
+import orjson
 from redis.asyncio import Redis
-from validator.db.src.database import PSQLDB
 from validator.control_node.src.control_config import Config
 from validator.models import Contender
 from core import task_config as tcfg
+from core.models import config_models as cmodels
 from validator.utils.contender import contender_utils as putils
 from validator.utils.generic import generic_constants as gcst
 from validator.utils.redis import redis_constants as rcst
 from core import constants as ccst
 from fiber.logging_utils import get_logger
 from opentelemetry import metrics
+from opentelemetry.metrics import CallbackOptions, Observation
 
 logger = get_logger(__name__)
 
-GAUGE_REQUESTS_TO_SKIP = metrics.get_meter(__name__).create_gauge(
+# Latest per-task scheduling stats. The hot loop only writes plain dict entries here;
+# the observable gauges below read it once per metrics export, instead of paying a
+# gauge.set (attribute dict + lock) per scheduled request.
+_TASK_SCHEDULING_STATS: Dict[str, Dict[str, int]] = {}
+
+
+def _observe_task_stat(stat: str):
+    def callback(options: CallbackOptions) -> List[Observation]:
+        return [
+            Observation(stats[stat], {"task": task})
+            for task, stats in _TASK_SCHEDULING_STATS.items()
+            if stat in stats
+        ]
+
+    return callback
+
+
+GAUGE_REQUESTS_TO_SKIP = metrics.get_meter(__name__).create_observable_gauge(
     "validator.control_node.synthetic.cycle.requests_to_skip",
+    callbacks=[_observe_task_stat("requests_to_skip")],
     description="Number of synthetic requests to skip for scheduled task"
 )
-GAUGE_SCHEDULE_REMAINING_REQUESTS = metrics.get_meter(__name__).create_gauge(
+GAUGE_SCHEDULE_REMAINING_REQUESTS = metrics.get_meter(__name__).create_observable_gauge(
     "validator.control_node.synthetic.cycle.schedule_remaining_requests",
+    callbacks=[_observe_task_stat("schedule_remaining_requests")],
     description="Number of remaining synthetic requests for scheduled task"
 )
-GAUGE_LATEST_REMAINING_REQUESTS = metrics.get_meter(__name__).create_gauge(
+GAUGE_LATEST_REMAINING_REQUESTS = metrics.get_meter(__name__).create_observable_gauge(
     "validator.control_node.synthetic.cycle.latest_remaining_requests",
+    callbacks=[_observe_task_stat("latest_remaining_requests")],
     description="Number of latest remaining synthetic requests for scheduled task"
 )
-GAUGE_TOTAL_REQUESTS = metrics.get_meter(__name__).create_gauge(
+GAUGE_TOTAL_REQUESTS = metrics.get_meter(__name__).create_observable_gauge(
     "validator.control_node.synthetic.cycle.total_requests",
+    callbacks=[_observe_task_stat("total_requests")],
     description="Number of total synthetic requests to be scheduled for the task in current cycle"
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class TaskScheduleInfo:
     task: str
     total_requests: int
@@ -46,30 +70,17 @@ class TaskScheduleInfo:
     next_schedule_time: float
     remaining_requests: int
 
-    def __lt__(self, other: "TaskScheduleInfo"):
-        return self.next_schedule_time < other.next_schedule_time
 
-
-async def _load_contenders(psql_db: PSQLDB) -> List[Contender]:
-    return await putils.load_contenders(psql_db)
-
-
-async def _group_contenders_by_task(contenders: List[Contender]) -> Dict[str, List[Contender]]:
-    task_groups: Dict[str, List[Contender]] = {}
+def _group_contenders_by_task(contenders: List[Contender]) -> Dict[str, List[Contender]]:
     task_configs = tcfg.get_task_configs()
+    task_groups: Dict[str, List[Contender]] = defaultdict(list)
     for contender in contenders:
-        if contender.task not in task_configs:
-            continue
-        if contender.task not in task_groups:
-            task_groups[contender.task] = []
-        task_groups[contender.task].append(contender)
-    return task_groups
+        if contender.task in task_configs:
+            task_groups[contender.task].append(contender)
+    return dict(task_groups)
 
 
-def _calculate_task_requests(task: str, contenders: List[Contender], config: Config) -> int:
-    task_config = tcfg.get_enabled_task_config(task)
-    if task_config is None:
-        return 0
+def _calculate_task_requests(task_config: cmodels.FullTaskConfig, contenders: List[Contender], config: Config) -> int:
     total_capacity = sum(c.capacity_to_score for c in contenders) * config.scoring_period_time_multiplier
     return int(total_capacity / task_config.volume_to_requests_conversion)
 
@@ -78,147 +89,254 @@ def _get_initial_schedule_time(current_time: float, interval: float) -> float:
     return current_time + random.random() * interval
 
 
-async def _initialize_task_schedules(task_groups: Dict[str, List[Contender]], config: Config) -> List[TaskScheduleInfo]:
+def _initialize_task_schedules(task_groups: Dict[str, List[Contender]], config: Config) -> List[TaskScheduleInfo]:
     scoring_period_time = ccst.SCORING_PERIOD_TIME * config.scoring_period_time_multiplier
+    task_configs = tcfg.get_task_configs()
     schedules = []
     for task, contenders in task_groups.items():
-        total_requests = _calculate_task_requests(task, contenders, config)
+        task_config = task_configs.get(task)
+        if task_config is None or not task_config.enabled:
+            continue
+        total_requests = _calculate_task_requests(task_config, contenders, config)
         if total_requests > 0:
             interval = scoring_period_time / (total_requests + 1)
-            current_time = time.time()
+            current_time = time.monotonic()
             first_schedule_time = _get_initial_schedule_time(current_time, interval)
-            schedule = TaskScheduleInfo(
-                task=task,
-                total_requests=total_requests,
-                interval=interval,
-                next_schedule_time=first_schedule_time,
-                remaining_requests=total_requests,
+            schedules.append(
+                TaskScheduleInfo(
+                    task=task,
+                    total_requests=total_requests,
+                    interval=interval,
+                    next_schedule_time=first_schedule_time,
+                    remaining_requests=total_requests,
+                )
             )
-            heapq.heappush(schedules, schedule)
     return schedules
 
 
-async def _update_redis_remaining_requests(redis_db: Redis, task: str, remaining_requests: int):
-    key = f"task_synthetics_info:{task}:requests_remaining"
-    await redis_db.set(key, remaining_requests)
-
-
-async def _get_redis_remaining_requests(redis_db: Redis, task: str) -> int:
-    key = f"task_synthetics_info:{task}:requests_remaining"
-    value = await redis_db.get(key)
-    return int(value) if value is not None else 0
-
-
-async def _schedule_synthetic_query(redis_db: Redis, task: str, max_len: int):
-    await putils.add_synthetic_query_to_queue(redis_db, task, max_len)
+def _remaining_requests_key(task: str) -> str:
+    return f"task_synthetics_info:{task}:requests_remaining"
+
+
+# Atomically reads the remaining-requests counter, and only if no other worker has consumed
+# requests in the meantime (remaining >= what we last saw), pushes the query onto the queue
+# and decrements the counter. One round-trip instead of a GET, an RPUSH and a SET.
+_SCHEDULE_QUERY_LUA = """
+local remaining = tonumber(redis.call('GET', KEYS[1]) or 0)
+if remaining <= 0 then
+    return {remaining, 0}
+end
+if remaining < tonumber(ARGV[2]) then
+    return {remaining, 0}
+end
+redis.call('RPUSH', KEYS[2], ARGV[1])
+redis.call('LTRIM', KEYS[2], 0, tonumber(ARGV[3]) - 1)
+redis.call('DECR', KEYS[1])
+return {remaining, 1}
+"""
+
+
+async def _set_initial_remaining_requests(redis_db: Redis, task_schedules: List[TaskScheduleInfo]) -> None:
+    if not task_schedules:
+        return
+    async with redis_db.pipeline(transaction=False) as pipe:
+        for schedule in task_schedules:
+            pipe.set(_remaining_requests_key(schedule.task), schedule.total_requests)
+        await pipe.execute()
+
+
+async def _try_schedule_synthetic_query(schedule_script, task: str, expected_remaining: int, max_len: int) -> tuple[int, bool]:
+    message = orjson.dumps(putils.construct_synthetic_query_message(task))
+    latest_remaining, scheduled = await schedule_script(
+        keys=[_remaining_requests_key(task), rcst.QUERY_QUEUE_KEY],
+        args=[message, expected_remaining, max_len],
+    )
+    if scheduled:
+        putils.COUNTER_SYNTHETIC_QUERIES.add(1, {"task": task})
+    return int(latest_remaining), bool(scheduled)
+
+
+async def _try_schedule_due_synthetic_queries(
+    redis_db: Redis, schedule_script, schedules: List[TaskScheduleInfo], max_len: int
+) -> List[tuple[int, bool]]:
+    async with redis_db.pipeline(transaction=False) as pipe:
+        for schedule in schedules:
+            message = orjson.dumps(putils.construct_synthetic_query_message(schedule.task))
+            await schedule_script(
+                keys=[_remaining_requests_key(schedule.task), rcst.QUERY_QUEUE_KEY],
+                args=[message, schedule.remaining_requests, max_len],
+                client=pipe,
+            )
+        raw_results = await pipe.execute()
+
+    results = []
+    for schedule, (latest_remaining, scheduled) in zip(schedules, raw_results):
+        if scheduled:
+            putils.COUNTER_SYNTHETIC_QUERIES.add(1, {"task": schedule.task})
+        results.append((int(latest_remaining), bool(scheduled)))
+    return results
+
+
+def _apply_schedule_result(
+    schedule: TaskScheduleInfo, latest_remaining_requests: int, scheduled: bool, now: float
+) -> bool:
+    """Advance a schedule after a scheduling attempt; returns whether the task still has work."""
+    if latest_remaining_requests <= 0:
+        logger.info(f"No more requests remaining for task {schedule.task}")
+        return False
+
+    requests_to_skip = schedule.remaining_requests - latest_remaining_requests
+    stats = _TASK_SCHEDULING_STATS.setdefault(schedule.task, {})
+    stats["requests_to_skip"] = requests_to_skip
+
+    if not scheduled:
+        logger.info(f"Skipping {requests_to_skip} requests for task {schedule.task}")
+
+        schedule.next_schedule_time += schedule.interval * requests_to_skip
+        schedule.remaining_requests = latest_remaining_requests
+        return True
+
+    schedule.next_schedule_time = now + schedule.interval
+    schedule.remaining_requests = latest_remaining_requests - 1
+
+    stats["total_requests"] = schedule.total_requests
+    stats["schedule_remaining_requests"] = schedule.remaining_requests
+    stats["latest_remaining_requests"] = latest_remaining_requests
+
+    if schedule.remaining_requests > 0:
+        return True
+    logger.info(f"No more requests remaining for task {schedule.task}")
+    return False
+
+
+# Filters synthetic entries out of the queue inside redis, so the full queue is never
+# shipped to python just to be json-parsed and pushed straight back. Returns the number
+# of entries removed.
+_CLEAR_SYNTHETIC_QUERIES_LUA = """
+local items = redis.call('LRANGE', KEYS[1], 0, -1)
+redis.call('DEL', KEYS[1])
+local removed = 0
+for _, item in ipairs(items) do
+    local ok, decoded = pcall(cjson.decode, item)
+    if ok and decoded['query_type'] == ARGV[1] then
+        removed = removed + 1
+    else
+        redis.call('RPUSH', KEYS[1], item)
+    end
+end
+return removed
+"""
 
 
 async def _clear_old_synthetic_queries(redis_db: Redis):
-    all_items = await redis_db.lrange(rcst.QUERY_QUEUE_KEY, 0, -1)  # type: ignore
-
-    non_synthetic_items = [item for item in all_items if json.loads(item).get("query_type") != gcst.SYNTHETIC]
-    await redis_db.delete(rcst.QUERY_QUEUE_KEY)
+    clear_script = redis_db.register_script(_CLEAR_SYNTHETIC_QUERIES_LUA)
+    removed = await clear_script(keys=[rcst.QUERY_QUEUE_KEY], args=[gcst.SYNTHETIC])
 
-    if non_synthetic_items:
-        await redis_db.rpush(rcst.QUERY_QUEUE_KEY, *non_synthetic_items)  # type: ignore
-
-    logger.info(f"Cleared {len(all_items) - len(non_synthetic_items)} synthetic queries from the queue")
+    logger.info(f"Cleared {removed} synthetic queries from the queue")
 
 
 async def schedule_synthetics_until_done(config: Config):
     scoring_period_time = ccst.SCORING_PERIOD_TIME * config.scoring_period_time_multiplier
     logger.info(f"Scheduling synthetics; this will take {scoring_period_time // 60} minutes ish...")
 
-    start_time = time.time()
+    start_time = time.monotonic()
+    _TASK_SCHEDULING_STATS.clear()
 
-    contenders = await _load_contenders(config.psql_db)
-    task_groups = await _group_contenders_by_task(contenders)
-    task_schedules = await _initialize_task_schedules(task_groups, config)
+    contenders = await putils.load_contenders(config.psql_db)
+    task_groups = _group_contenders_by_task(contenders)
+    task_schedules = _initialize_task_schedules(task_groups, config)
     await _clear_old_synthetic_queries(config.redis_db)
 
-    for schedule in task_schedules:
-        await _update_redis_remaining_requests(config.redis_db, schedule.task, schedule.total_requests)
+    await _set_initial_remaining_requests(config.redis_db, task_schedules)
+    schedule_script = config.redis_db.register_script(_SCHEDULE_QUERY_LUA)
+
+    # The heap only holds (next_schedule_time, index) tuples - small nodes with C-level
+    # comparisons - while the full TaskScheduleInfo objects stay put in task_schedules.
+    schedule_heap = [(schedule.next_schedule_time, idx) for idx, schedule in enumerate(task_schedules)]
+    heapq.heapify(schedule_heap)
+
+    # Local bindings so the hot loop hits LOAD_FAST instead of a global plus attribute
+    # lookup for every heap op and clock read
+    _monotonic = time.monotonic
+    _heappop = heapq.heappop
+    _heappush = heapq.heappush
+    _heapreplace = heapq.heapreplace
+    debug_enabled = logger.isEnabledFor(logging.DEBUG)
 
     i = 0
-    while task_schedules:
+    while schedule_heap:
         i += 1
-        schedule = heapq.heappop(task_schedules)
-        time_to_sleep = schedule.next_schedule_time - time.time()
+        # One clock read per iteration; monotonic so wall-clock jumps can't skew the schedule
+        now = _monotonic()
+        # Peek rather than pop - rescheduling the same task is then a single heapreplace
+        # (one sift) instead of a heappop plus a heappush.
+        _, schedule_idx = schedule_heap[0]
+        schedule = task_schedules[schedule_idx]
+        time_to_sleep = schedule.next_schedule_time - now
 
         if time_to_sleep > 0:
-            if time.time() - start_time + time_to_sleep > scoring_period_time:
+            if now - start_time + time_to_sleep > scoring_period_time:
                 break
 
-            logger.debug(
-                f"Sleeping for {time_to_sleep} seconds while waiting for task {schedule.task} to be scheduled;"
-                f"{schedule.remaining_requests} requests remaining - estimated to take {schedule.remaining_requests  * schedule.interval} more seconds"
+            if debug_enabled:
+                logger.debug(
+                    f"Sleeping for {time_to_sleep} seconds while waiting for task {schedule.task} to be scheduled;"
+                    f"{schedule.remaining_requests} requests remaining - estimated to take {schedule.remaining_requests  * schedule.interval} more seconds"
+                )
+            await asyncio.sleep(time_to_sleep)
+            now = _monotonic()
+
+        # When several tasks are due at once, drain them all and batch their redis trips
+        # into one pipelined round-trip; the common single-task case keeps the
+        # heapreplace fast path.
+        if len(schedule_heap) > 1 and min(schedule_heap[1:3])[0] <= now:
+            due_idxs = [_heappop(schedule_heap)[1]]
+            while schedule_heap and schedule_heap[0][0] <= now:
+                due_idxs.append(_heappop(schedule_heap)[1])
+
+            results = await _try_schedule_due_synthetic_queries(
+                config.redis_db, schedule_script, [task_schedules[idx] for idx in due_idxs], max_len=100
             )
-            sleep_chunk = 2  # Sleep in 2-second chunks to make debugging easier
-            while time_to_sleep > 0:
-                await asyncio.sleep(min(sleep_chunk, time_to_sleep))
-                time_to_sleep -= sleep_chunk
-
-        latest_remaining_requests = await _get_redis_remaining_requests(config.redis_db, schedule.task)
-        if latest_remaining_requests <= 0:
-            logger.info(f"No more requests remaining for task {schedule.task}")
-            continue
-
-        requests_to_skip = schedule.remaining_requests - latest_remaining_requests
-        GAUGE_REQUESTS_TO_SKIP.set(requests_to_skip, {"task": schedule.task})
-
-        if requests_to_skip > 0:
-            logger.info(f"Skipping {requests_to_skip} requests for task {schedule.task}")
-
-            schedule.next_schedule_time += schedule.interval * requests_to_skip
-            schedule.remaining_requests = latest_remaining_requests
-            heapq.heappush(task_schedules, schedule)
-            continue
-        else:
-            await _schedule_synthetic_query(config.redis_db, schedule.task, max_len=100)
-
-
-            remaining_requests = latest_remaining_requests - 1
-            await _update_redis_remaining_requests(config.redis_db, schedule.task, remaining_requests)
-            schedule.next_schedule_time = time.time() + schedule.interval
-            schedule.remaining_requests = remaining_requests
-
-        GAUGE_TOTAL_REQUESTS.set(schedule.total_requests, {"task": schedule.task})
-        GAUGE_SCHEDULE_REMAINING_REQUESTS.set(schedule.remaining_requests, {"task": schedule.task})
-        GAUGE_LATEST_REMAINING_REQUESTS.set(latest_remaining_requests, {"task": schedule.task})
-        
-        if schedule.remaining_requests > 0:
-            heapq.heappush(task_schedules, schedule)
+            for idx, (latest_remaining_requests, scheduled) in zip(due_idxs, results):
+                due_schedule = task_schedules[idx]
+                if _apply_schedule_result(due_schedule, latest_remaining_requests, scheduled, now):
+                    _heappush(schedule_heap, (due_schedule.next_schedule_time, idx))
         else:
-            logger.info(f"No more requests remaining for task {schedule.task}")
+            latest_remaining_requests, scheduled = await _try_schedule_synthetic_query(
+                schedule_script, schedule.task, schedule.remaining_requests, max_len=100
+            )
+            if _apply_schedule_result(schedule, latest_remaining_requests, scheduled, now):
+                _heapreplace(schedule_heap, (schedule.next_schedule_time, schedule_idx))
+            else:
+                _heappop(schedule_heap)
 
-        if time.time() - start_time > scoring_period_time:
+        if now - start_time > scoring_period_time:
             break
 
         if i % 100 == 0:
-            # Print full stats of all tasks
-            schedules_left = [heapq.heappop(task_schedules) for _ in range(len(task_schedules))]
-            
+            # Print full stats of all tasks. sorted() gives a human-friendly order without
+            # tearing the heap down and rebuilding it just for a log line
             task_info = []
-            for schedule in schedules_left:
+            for _, idx in sorted(schedule_heap):
+                schedule = task_schedules[idx]
                 task_info.append(
                     f"Task {schedule.task}:\n"
                     f"  - Scheduled: {schedule.total_requests - schedule.remaining_requests} / {schedule.total_requests}\n"
-                    f"  - Next request: {schedule.next_schedule_time - time.time():.2f} seconds from now\n"
+                    f"  - Next request: {schedule.next_schedule_time - now:.2f} seconds from now\n"
                     f"  - Estimated completion: {schedule.remaining_requests * schedule.interval:.2f} seconds"
                 )
-                heapq.heappush(task_schedules, schedule)
 
             logger.info(
                 f"Synthetic query scheduling status:\n"
                 f"Iterations: {i}\n"
-                f"Time elapsed: {time.time() - start_time:.2f} / {scoring_period_time:.2f} seconds\n"
+                f"Time elapsed: {now - start_time:.2f} / {scoring_period_time:.2f} seconds\n"
                 f"Task details:\n" + "\n\n".join(task_info)
             )
 
 
-    schedules_left = [heapq.heappop(task_schedules) for _ in range(len(task_schedules))]
+    schedules_left = [task_schedules[idx] for _, idx in sorted(schedule_heap)]
     logger.info(
-        f"Some info:\n iterations: {i}\n time elapsed: {time.time() - start_time} - max time: {scoring_period_time}\n"
+        f"Some info:\n iterations: {i}\n time elapsed: {time.monotonic() - start_time} - max time: {scoring_period_time}\n"
         f"schedules left: {[s.task for s in schedules_left]}"
     )
     logger.info("All tasks completed. Waiting for 10 seconds to take a breath...")
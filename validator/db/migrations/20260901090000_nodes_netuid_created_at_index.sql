@@ -0,0 +1,5 @@
+-- migrate:up
+CREATE INDEX IF NOT EXISTS idx_nodes_netuid_created_at ON nodes (netuid, created_at DESC);
+
+-- migrate:down
+DROP INDEX IF EXISTS idx_nodes_netuid_created_at;
@@ -24,7 +24,9 @@ class PSQLDB:
         logger.debug(f"Connecting to {self.connection_string}....")
         if self.pool is None:
             try:
-                self.pool = await asyncpg.create_pool(self.connection_string)
+                # Explicit statement cache so repeated queries (stable SQL text) skip
+                # parse + plan on every call after a connection's first
+                self.pool = await asyncpg.create_pool(self.connection_string, statement_cache_size=256)
                 if self.pool is None:
                     raise ConnectionError("Failed to create connection pool")
                 else:
@@ -1,4 +1,6 @@
 import datetime
+import logging
+
 from fiber import SubstrateInterface
 from validator.db.src.database import PSQLDB
 from fiber.networking.models import NodeWithFernet as Node
@@ -13,31 +15,68 @@ from validator.utils.substrate.query_substrate import query_substrate
 
 logger = get_logger(__name__)
 
+# Query text is built once at import time; asyncpg's per-connection statement cache is
+# keyed on the SQL string, so every call after a connection's first reuses the prepared plan.
+_GET_NODES_QUERY = f"""
+    SELECT
+        {dcst.HOTKEY},
+        {dcst.COLDKEY},
+        {dcst.NODE_ID},
+        {dcst.INCENTIVE},
+        {dcst.NETUID},
+        {dcst.STAKE},
+        {dcst.TRUST},
+        {dcst.VTRUST},
+        {dcst.LAST_UPDATED},
+        {dcst.IP},
+        {dcst.IP_TYPE},
+        {dcst.PORT},
+        {dcst.PROTOCOL}
+    FROM {dcst.NODES_TABLE}
+    WHERE {dcst.NETUID} = $1
+"""
+
+_GET_NODE_STAKES_QUERY = f"""
+    SELECT {dcst.HOTKEY}, {dcst.STAKE}
+    FROM {dcst.NODES_TABLE}
+    WHERE {dcst.NETUID} = $1
+"""
+
+_GET_NODE_QUERY = f"""
+    SELECT
+        {dcst.HOTKEY},
+        {dcst.COLDKEY},
+        {dcst.NODE_ID},
+        {dcst.INCENTIVE},
+        {dcst.NETUID},
+        {dcst.STAKE},
+        {dcst.TRUST},
+        {dcst.VTRUST},
+        {dcst.LAST_UPDATED},
+        {dcst.IP},
+        {dcst.IP_TYPE},
+        {dcst.PORT},
+        {dcst.PROTOCOL},
+        {dcst.SYMMETRIC_KEY},
+        {dcst.SYMMETRIC_KEY_UUID}
+    FROM {dcst.NODES_TABLE}
+    WHERE {dcst.NODE_ID} = $1 AND {dcst.NETUID} = $2
+"""
+
+_GET_VALI_SS58_ADDRESS_QUERY = f"""
+    SELECT
+        {dcst.HOTKEY}
+    FROM {dcst.NODES_TABLE}
+    WHERE {dcst.OUR_VALIDATOR} = true AND {dcst.NETUID} = $1
+"""
+
 
 async def insert_nodes(connection: Connection, nodes: list[Node], network: str) -> None:
     logger.debug(f"Inserting {len(nodes)} nodes into {dcst.NODES_TABLE}...")
-    await connection.executemany(
-        f"""
-        INSERT INTO {dcst.NODES_TABLE} (
-            {dcst.HOTKEY},
-            {dcst.COLDKEY},
-            {dcst.NODE_ID},
-            {dcst.INCENTIVE},
-            {dcst.NETUID},
-            {dcst.STAKE},
-            {dcst.TRUST},
-            {dcst.VTRUST},
-            {dcst.LAST_UPDATED},
-            {dcst.IP},
-            {dcst.IP_TYPE},
-            {dcst.PORT},
-            {dcst.PROTOCOL},
-            {dcst.NETWORK},
-            {dcst.SYMMETRIC_KEY}
-        )
-        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15)
-        """,
-        [
+    # COPY streams all rows in one round-trip, rather than a Bind/Execute pair per row
+    await connection.copy_records_to_table(
+        dcst.NODES_TABLE,
+        records=[
             (
                 node.hotkey,
                 node.coldkey,
@@ -57,13 +96,51 @@ async def insert_nodes(connection: Connection, nodes: list[Node], network: str)
             )
             for node in nodes
         ],
+        columns=[
+            dcst.HOTKEY,
+            dcst.COLDKEY,
+            dcst.NODE_ID,
+            dcst.INCENTIVE,
+            dcst.NETUID,
+            dcst.STAKE,
+            dcst.TRUST,
+            dcst.VTRUST,
+            dcst.LAST_UPDATED,
+            dcst.IP,
+            dcst.IP_TYPE,
+            dcst.PORT,
+            dcst.PROTOCOL,
+            dcst.NETWORK,
+            dcst.SYMMETRIC_KEY,
+        ],
     )
 
 
 async def migrate_nodes_to_history(connection: Connection) -> None:  # noqa: F821
     logger.debug("Migrating NODEs to NODE history")
+    # Single DELETE ... RETURNING CTE so the table is scanned once and is never
+    # left half-migrated between two statements
     await connection.execute(
         f"""
+        WITH moved AS (
+            DELETE FROM {dcst.NODES_TABLE}
+            RETURNING
+                {dcst.HOTKEY},
+                {dcst.COLDKEY},
+                {dcst.NODE_ID},
+                {dcst.INCENTIVE},
+                {dcst.NETUID},
+                {dcst.STAKE},
+                {dcst.TRUST},
+                {dcst.VTRUST},
+                {dcst.LAST_UPDATED},
+                {dcst.IP},
+                {dcst.IP_TYPE},
+                {dcst.PORT},
+                {dcst.PROTOCOL},
+                {dcst.NETWORK},
+                {dcst.CREATED_AT}
+        )
         INSERT INTO {dcst.NODES_HISTORY_TABLE} (
             {dcst.HOTKEY},
             {dcst.COLDKEY},
@@ -97,105 +174,75 @@ async def migrate_nodes_to_history(connection: Connection) -> None:  # noqa: F82
             {dcst.PROTOCOL},
             {dcst.NETWORK},
             {dcst.CREATED_AT}
-        FROM {dcst.NODES_TABLE}
+        FROM moved
     """
     )
 
-    logger.debug("Truncating NODE info table")
-    await connection.execute(f"DELETE FROM {dcst.NODES_TABLE}")
-
 
 async def get_last_updated_time_for_nodes(connection: Connection, netuid: int) -> datetime.datetime | None:
+    # Satisfied by a single-tuple scan of idx_nodes_netuid_created_at rather than
+    # aggregating over every node for the netuid
     query = f"""
-        SELECT MAX({dcst.CREATED_AT})
+        SELECT {dcst.CREATED_AT}
         FROM {dcst.NODES_TABLE}
         WHERE {dcst.NETUID} = $1
+        ORDER BY {dcst.CREATED_AT} DESC
+        LIMIT 1
     """
     return await connection.fetchval(query, netuid)
 
 
 async def insert_symmetric_keys_for_nodes(connection: Connection, nodes: list[Node]) -> None:
-    logger.info(f"Inserting {len([node for node in nodes if node.fernet is not None])} nodes into {dcst.NODES_TABLE}...")
+    rows = [
+        (futils.fernet_to_symmetric_key(node.fernet), node.symmetric_key_uuid, node.hotkey, node.netuid)
+        for node in nodes
+        if node.fernet is not None
+    ]
+    logger.info(f"Inserting {len(rows)} nodes into {dcst.NODES_TABLE}...")
+    if not rows:
+        return
     await connection.executemany(
         f"""
         UPDATE {dcst.NODES_TABLE}
         SET {dcst.SYMMETRIC_KEY} = $1, {dcst.SYMMETRIC_KEY_UUID} = $2
         WHERE {dcst.HOTKEY} = $3 and {dcst.NETUID} = $4
         """,
-        [
-            (futils.fernet_to_symmetric_key(node.fernet), node.symmetric_key_uuid, node.hotkey, node.netuid)
-            for node in nodes
-            if node.fernet is not None
-        ],
+        rows,
     )
 
 
 async def get_nodes(psql_db: PSQLDB, netuid: int) -> list[Node]:
-    query = f"""
-        SELECT 
-            {dcst.HOTKEY},
-            {dcst.COLDKEY},
-            {dcst.NODE_ID},
-            {dcst.INCENTIVE},
-            {dcst.NETUID},
-            {dcst.STAKE},
-            {dcst.TRUST},
-            {dcst.VTRUST},
-            {dcst.LAST_UPDATED},
-            {dcst.IP},
-            {dcst.IP_TYPE},
-            {dcst.PORT},
-            {dcst.PROTOCOL}
-        FROM {dcst.NODES_TABLE}
-        WHERE {dcst.NETUID} = $1
-    """
-
-    nodes = await psql_db.fetchall(query, netuid)
+    nodes = await psql_db.fetchall(_GET_NODES_QUERY, netuid)
 
     return [Node(**node) for node in nodes]
 
 
+async def get_nodes_with_stakes(psql_db: PSQLDB, netuid: int) -> tuple[list[Node], dict[str, float]]:
+    """Fetch the nodes and their stake map from a single scan, for callers needing both."""
+    rows = await psql_db.fetchall(_GET_NODES_QUERY, netuid)
+
+    nodes = [Node(**row) for row in rows]
+    hotkey_to_stake = {row[dcst.HOTKEY]: row[dcst.STAKE] for row in rows}
+    return nodes, hotkey_to_stake
+
+
 async def get_node_stakes(psql_db: PSQLDB, netuid: int) -> dict[str, float]:
-    NODEs = await psql_db.fetchall(
-        f"""
-        SELECT {dcst.HOTKEY}, {dcst.STAKE}
-        FROM {dcst.NODES_TABLE}
-        WHERE {dcst.NETUID} = $1
-        """,
-        netuid,
-    )
+    NODEs = await psql_db.fetchall(_GET_NODE_STAKES_QUERY, netuid)
     hotkey_to_stake = {NODE[dcst.HOTKEY]: NODE[dcst.STAKE] for NODE in NODEs}
 
     return hotkey_to_stake
 
 
 async def get_node(psql_db: PSQLDB, node_id: int, netuid: int) -> Node | None:
-    query = f"""
-        SELECT 
-            {dcst.HOTKEY},
-            {dcst.COLDKEY},
-            {dcst.NODE_ID},
-            {dcst.INCENTIVE},
-            {dcst.NETUID},
-            {dcst.STAKE},
-            {dcst.TRUST},
-            {dcst.VTRUST},
-            {dcst.LAST_UPDATED},
-            {dcst.IP},
-            {dcst.IP_TYPE},
-            {dcst.PORT},
-            {dcst.PROTOCOL},
-            {dcst.SYMMETRIC_KEY},
-            {dcst.SYMMETRIC_KEY_UUID}
-        FROM {dcst.NODES_TABLE}
-        WHERE {dcst.NODE_ID} = $1 AND {dcst.NETUID} = $2
-    """
-
-    node = await psql_db.fetchone(query, node_id, netuid)
+    node = await psql_db.fetchone(_GET_NODE_QUERY, node_id, netuid)
 
     if node is None:
         logger.error(f"No node found for node id {node_id} and netuid {netuid}")
-        logger.error(f"all nodes: {await psql_db.fetchall(f'SELECT * FROM {dcst.NODES_TABLE} WHERE {dcst.NETUID} = $1', netuid)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            sample_nodes = await psql_db.fetchall(
+                f"SELECT * FROM {dcst.NODES_TABLE} WHERE {dcst.NETUID} = $1 LIMIT 20", netuid
+            )
+            logger.debug(f"Sample of nodes for netuid {netuid}: {sample_nodes}")
         raise ValueError(f"No node found for node id {node_id} and netuid {netuid}")
     try:
         node["fernet"] = Fernet(node[dcst.SYMMETRIC_KEY])
@@ -216,14 +263,7 @@ async def update_our_vali_node_in_db(connection: Connection, ss58_address: str,
 
 
 async def get_vali_ss58_address(psql_db: PSQLDB, netuid: int) -> str | None:
-    query = f"""
-        SELECT 
-            {dcst.HOTKEY}
-        FROM {dcst.NODES_TABLE}
-        WHERE {dcst.OUR_VALIDATOR} = true AND {dcst.NETUID} = $1
-    """
-
-    node = await psql_db.fetchone(query, netuid)
+    node = await psql_db.fetchone(_GET_VALI_SS58_ADDRESS_QUERY, netuid)
 
     if node is None:
         logger.error(f"I cannot find the validator node for netuid {netuid} in the DB. Maybe control node is still syncing?")
@@ -8,7 +8,7 @@ import asyncio
 from redis.asyncio import Redis
 
 from fiber.logging_utils import get_logger
-import json
+import orjson
 from validator.query_node.src.query_config import Config
 from validator.utils.redis import redis_constants as rcst, redis_dataclasses as rdc
 from validator.query_node.src.process_queries import process_task
@@ -97,7 +97,7 @@ async def listen_for_tasks(config: Config):
                 # QUERY_NODE_FAILED_POPS_COUNTER.add(1)
                 break
             try:
-                task = asyncio.create_task(process_task(config, rdc.QueryQueueMessage(**json.loads(message_json[1]))))
+                task = asyncio.create_task(process_task(config, rdc.QueryQueueMessage(**orjson.loads(message_json[1]))))
                 tasks.add(task)
             except TypeError:
                 QUERY_NODE_FAILED_TASKS_COUNTER.add(1)